@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+"""
+Yhteinen HTML -> teksti -muunnos uutisputkelle ja blocklist-ehdottajalle.
+
+Perustuu standardikirjaston ``html.parser``-tokenisoijaan: teksti kerätään
+suoraan tokenivirrasta ilman DOM-puuta, ja epäolennaiset osat (script,
+style, nav, footer jne.) ohitetaan lennossa. Syöte katkaistaan
+``MAX_HTML_CHARS``-rajaan ja tulokset muistetaan sisällön tiivisteen
+perusteella, joten samaa tiivistelmää ei siivota kahdesti saman ajon aikana.
+Välimuistin voi säilyttää ajojen välillä tiedostossa ``CACHE_FILE``, kun
+uutisputki kutsuu ``load_cache``-funktiota alussa ja ``save_cache``-funktiota
+lopussa.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import sys
+from collections import OrderedDict
+from html.parser import HTMLParser
+from pathlib import Path
+
+CACHE_FILE = Path(__file__).resolve().parent / "html_cache.json"
+
+MAX_HTML_CHARS = 500_000
+CACHE_SIZE = 4096
+
+SKIP_TAGS = frozenset({
+    "script", "style", "nav", "aside", "footer", "header", "noscript",
+    "template", "svg", "iframe",
+})
+# Näiden ympärille ei lisätä välilyöntiä, jottei sana katkea kahtia
+INLINE_TAGS = frozenset({
+    "a", "abbr", "b", "bdi", "bdo", "cite", "code", "data", "dfn", "em", "i",
+    "kbd", "mark", "q", "s", "samp", "small", "span", "strong", "sub", "sup",
+    "time", "u", "var",
+})
+VOID_TAGS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+    "source", "track", "wbr",
+})
+
+_WS_RE = re.compile(r"\s+")
+_CACHE: OrderedDict[str, str] = OrderedDict()
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: list[str] = []
+        # Avoimet elementit pinossa, jotta sulkematon tai väärin sisäkkäinen
+        # ohitettava tagi sulkeutuu viimeistään vanhempansa mukana
+        self._open: list[str] = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag not in VOID_TAGS:
+            self._open.append(tag)
+            if tag in SKIP_TAGS:
+                self._skip_depth += 1
+        if tag not in SKIP_TAGS and tag not in INLINE_TAGS:
+            self.parts.append(" ")
+
+    def handle_startendtag(self, tag, attrs):
+        if tag not in INLINE_TAGS:
+            self.parts.append(" ")
+
+    def handle_endtag(self, tag):
+        if tag in self._open:
+            while self._open:
+                opened = self._open.pop()
+                if opened in SKIP_TAGS:
+                    self._skip_depth -= 1
+                if opened == tag:
+                    break
+        if tag not in SKIP_TAGS and tag not in INLINE_TAGS and tag not in VOID_TAGS:
+            self.parts.append(" ")
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(data)
+
+
+def _extract(raw: str) -> str:
+    parser = _TextExtractor()
+    parser.feed(raw)
+    parser.close()
+    return _WS_RE.sub(" ", "".join(parser.parts)).strip()
+
+
+def _cap(raw: str, max_chars: int) -> str:
+    """Katkaise syöte, mutta ei kesken tagia (muuten close() tulostaa sen tekstinä)."""
+    if len(raw) <= max_chars:
+        return raw
+    raw = raw[:max_chars]
+    lt = raw.rfind("<")
+    if lt > raw.rfind(">"):
+        raw = raw[:lt]
+    return raw
+
+
+def content_hash(raw: str) -> str:
+    return hashlib.sha1(raw.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+def html_to_text(raw: str | None, max_chars: int = MAX_HTML_CHARS) -> str:
+    """Palauta HTML:n näkyvä teksti yhdeksi riviksi tiivistettynä."""
+    if not raw:
+        return ""
+    raw = _cap(raw, max_chars)
+    key = content_hash(raw)
+    cached = _CACHE.get(key)
+    if cached is not None:
+        _CACHE.move_to_end(key)
+        return cached
+    text = _extract(raw)
+    _CACHE[key] = text
+    if len(_CACHE) > CACHE_SIZE:
+        _CACHE.popitem(last=False)
+    return text
+
+
+def load_cache(path: Path = CACHE_FILE) -> None:
+    if not path.exists():
+        return
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (json.JSONDecodeError, OSError) as e:
+        print(f"[WARN] HTML-välimuisti rikki, ohitetaan: {e}", file=sys.stderr)
+        return
+    if not isinstance(data, dict):
+        print("[WARN] HTML-välimuisti rikki, ohitetaan: ei sanakirja", file=sys.stderr)
+        return
+    for key, text in data.items():
+        if isinstance(key, str) and isinstance(text, str):
+            _CACHE[key] = text
+    while len(_CACHE) > CACHE_SIZE:
+        _CACHE.popitem(last=False)
+
+
+def save_cache(path: Path = CACHE_FILE) -> None:
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(_CACHE, ensure_ascii=False), encoding="utf-8")
+    tmp.replace(path)
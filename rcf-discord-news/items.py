@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+
+"""
+Kevyt uutisalkio, joka kulkee koko putken läpi.
+
+feedparserin entry-oliot kantavat mukanaan kaiken syötteen sisällön (koko
+HTML-sisältö, enclosuret, kirjoittajatiedot jne.). ``NewsItem`` poimii niistä
+vain tarvittavat kentät kertaalleen jäsennyksen yhteydessä, ja otsikko sekä
+tiivistelmä normalisoidaan vain kerran.
+"""
+
+from __future__ import annotations
+
+import calendar
+import hashlib
+import re
+import time
+from typing import Callable, NamedTuple
+from urllib.parse import unquote_plus, urlsplit, urlunsplit
+
+from html_text import html_to_text
+
+_WS_RE = re.compile(r"\s+")
+_QUERY_SEP_RE = re.compile(r"([&;])")
+_TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid")
+
+
+class NewsItem(NamedTuple):
+    link: str
+    uid: str
+    title: str
+    summary: str
+    source: str
+    published_ts: float
+    topic_key: str = ""
+    thumbnail: str = ""
+
+
+def collapse_ws(raw: str | None) -> str:
+    """Tiivistä välilyönnit. feedparser on jo purkanut otsikot tekstiksi."""
+    return _WS_RE.sub(" ", raw or "").strip()
+
+
+def canonical_link(url: str | None) -> str:
+    """Normalisoi linkki: pienet kirjaimet hostiin, ei fragmenttia eikä seurantaparametreja."""
+    if not url:
+        return ""
+    parts = urlsplit(url.strip())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path,
+                       _strip_tracking(parts.query), ""))
+
+
+def _strip_tracking(query: str) -> str:
+    """Poista seurantaparametrit; muut parit jäävät täsmälleen ennalleen."""
+    tokens = _QUERY_SEP_RE.split(query)
+    kept: list[str] = []
+    for i in range(0, len(tokens), 2):
+        pair = tokens[i]
+        key = unquote_plus(pair.split("=", 1)[0]).lower()
+        if pair and key.startswith(_TRACKING_PARAMS):
+            continue
+        if kept:
+            kept.append(tokens[i - 1])
+        kept.append(pair)
+    return "".join(kept)
+
+
+def id_hash(raw: str) -> str:
+    """
+    sha256-tunniste ``seen.json``-muodossa.
+
+    Syötteenä on syötteen alkuperäinen linkki sellaisenaan (ei
+    ``canonical_link``-muotoa), jotta tunnisteet pysyvät samoina kuin jo
+    nähdyillä uutisilla eikä vanhoja postata uudelleen.
+    """
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _entry_timestamp(entry) -> float:
+    for key in ("published_parsed", "updated_parsed"):
+        parsed = entry.get(key)
+        if parsed:
+            return float(calendar.timegm(parsed))
+    return time.time()
+
+
+def _is_image(media) -> bool:
+    return media.get("medium") == "image" or (media.get("type") or "").startswith("image/")
+
+
+def _entry_thumbnail(entry) -> str:
+    for media in entry.get("media_thumbnail") or []:
+        if media.get("url"):
+            return media["url"]
+    # media_content voi olla myös video tai ääni
+    for media in entry.get("media_content") or []:
+        if media.get("url") and _is_image(media):
+            return media["url"]
+    for enc in entry.get("enclosures") or []:
+        if (enc.get("type") or "").startswith("image/") and enc.get("href"):
+            return enc["href"]
+    return ""
+
+
+def from_entry(
+    entry,
+    source: str,
+    topic_key: Callable[[str], str] | None = None,
+) -> NewsItem:
+    """Rakenna ``NewsItem`` feedparserin entrystä. Kutsu kerran per entry."""
+    raw_link = entry.get("link") or ""
+    title = collapse_ws(entry.get("title"))
+    return NewsItem(
+        link=canonical_link(raw_link),
+        uid=id_hash(raw_link or entry.get("id") or title),
+        title=title,
+        summary=html_to_text(entry.get("summary")),
+        source=source,
+        published_ts=_entry_timestamp(entry),
+        topic_key=topic_key(title) if topic_key else "",
+        thumbnail=_entry_thumbnail(entry),
+    )
@@ -0,0 +1,484 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Pysyvä prioriteettijono lähteville uutispostauksille.
+
+Uutishaku lisää hyväksytyt uutiset jonoon (``enqueue``) sen sijaan, että ne
+postattaisiin heti syötteen järjestyksessä. Jono tallennetaan tiedostoon
+``post_queue.json`` ja puretaan (``drain``) tasaisella tahdilla, jolloin
+ruuhkahuiput eivät laukaise Discordin rate limitiä ja haku ehtii valmistua
+nopeasti.
+
+Prioriteetti = whitelist-osumat + lähteen paino + tuoreusbonus.
+
+Jono tallennetaan jokaisen postauksen jälkeen, ja tallennus yhdistää
+tiedostoon purun aikana lisätyt alkiot. Uutishaun kannattaa lisätä alkiot
+lukon alla::
+
+    with update_queue() as queue:
+        enqueue_item(queue, item, payload)
+
+Asetukset ympäristömuuttujista:
+- POST_INTERVAL_SECONDS     tauko postausten välillä (oletus 20)
+- POST_DRAIN_MAX_SECONDS    kuinka kauan yksi ajo saa purkaa jonoa (oletus 600)
+- POST_QUIET_HOURS          hiljaiset tunnit Helsingin aikaa, esim. "23-7"
+- POST_CHANNEL_BUDGETS      päiväkohtaiset kiintiöt, esim. "news=25,review=10"
+- POST_SOURCE_WEIGHTS       lähteiden painot, esim. "zwiftinsider.com=3,youtube.com=1"
+- POST_RECENCY_HALF_LIFE_H  tuoreusbonuksen puoliintumisaika tunteina (oletus 12)
+- POST_MAX_AGE_H            tätä vanhemmat pudotetaan jonosta (oletus 72)
+"""
+
+from __future__ import annotations
+
+import fcntl
+import heapq
+import itertools
+import json
+import math
+import os
+import re
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Iterator, NamedTuple
+from zoneinfo import ZoneInfo
+
+import requests
+
+from items import NewsItem
+
+BASE = Path(__file__).resolve().parent
+QUEUE_FILE = BASE / "post_queue.json"
+WHITELIST_FILE = BASE / "whitelist.txt"
+
+LOCAL_TZ = ZoneInfo("Europe/Helsinki")
+DEFAULT_CHANNEL = "news"
+
+
+def env_float(name: str, default: float, *, positive: bool = False) -> float:
+    """Lue luku ympäristömuuttujasta; virheellinen arvo -> oletus ja varoitus."""
+    raw = os.environ.get(name, "")
+    if not raw.strip():
+        return default
+    try:
+        value = float(raw)
+    except ValueError:
+        value = float("nan")
+    if not math.isfinite(value) or value < 0 or (positive and value == 0):
+        print(f"[WARN] Virheellinen {name}={raw!r}, käytetään oletusta {default}", file=sys.stderr)
+        return default
+    return value
+
+
+POST_INTERVAL_SECONDS = env_float("POST_INTERVAL_SECONDS", 20.0)
+POST_DRAIN_MAX_SECONDS = env_float("POST_DRAIN_MAX_SECONDS", 600.0)
+POST_QUIET_HOURS = os.environ.get("POST_QUIET_HOURS", "")
+POST_CHANNEL_BUDGETS = os.environ.get("POST_CHANNEL_BUDGETS", "")
+POST_SOURCE_WEIGHTS = os.environ.get("POST_SOURCE_WEIGHTS", "")
+POST_RECENCY_HALF_LIFE_H = env_float("POST_RECENCY_HALF_LIFE_H", 12.0, positive=True)
+POST_MAX_AGE_H = env_float("POST_MAX_AGE_H", 72.0)
+
+WHITELIST_WEIGHT = 2.0
+WHITELIST_MAX_HITS = 3
+RECENCY_WEIGHT = 3.0
+
+_WHITELIST_PATTERNS: list[re.Pattern] | None = None
+
+
+# ----- Asetusten jäsennys -----
+
+def parse_weights(raw: str) -> dict[str, float]:
+    """Jäsennä "avain=arvo,avain=arvo" -merkkijono sanakirjaksi."""
+    out: dict[str, float] = {}
+    for part in (raw or "").split(","):
+        key, sep, value = part.partition("=")
+        if not sep or not key.strip():
+            continue
+        try:
+            out[key.strip().lower()] = float(value)
+        except ValueError:
+            continue
+    return out
+
+
+def parse_quiet_hours(raw: str) -> tuple[int, int] | None:
+    """Jäsennä "23-7" muotoon (alku, loppu). Tyhjä -> ei hiljaisia tunteja."""
+    m = re.fullmatch(r"\s*(\d{1,2})\s*-\s*(\d{1,2})\s*", raw or "")
+    if not m:
+        return None
+    start, end = int(m.group(1)) % 24, int(m.group(2)) % 24
+    if start == end:
+        return None
+    return start, end
+
+
+def in_quiet_hours(now: datetime, quiet: tuple[int, int] | None) -> bool:
+    if not quiet:
+        return False
+    hour = now.astimezone(LOCAL_TZ).hour
+    start, end = quiet
+    if start < end:
+        return start <= hour < end
+    # Yli keskiyön menevä väli, esim. 23-7
+    return hour >= start or hour < end
+
+
+# ----- Prioriteetti -----
+
+def load_whitelist_patterns(path: Path = WHITELIST_FILE) -> list[re.Pattern]:
+    if not path.exists():
+        return []
+    patterns = []
+    for ln in path.read_text(encoding="utf-8").splitlines():
+        term = ln.strip()
+        if not term or term.startswith("#"):
+            continue
+        patterns.append(re.compile(r"(?<!\w)" + re.escape(term) + r"(?!\w)", re.IGNORECASE))
+    return patterns
+
+
+def whitelist_strength(title: str, summary: str) -> int:
+    """Montako whitelist-termiä osuu; otsikko-osuma lasketaan kahdesti."""
+    global _WHITELIST_PATTERNS
+    if _WHITELIST_PATTERNS is None:
+        _WHITELIST_PATTERNS = load_whitelist_patterns()
+    hits = 0
+    for pat in _WHITELIST_PATTERNS:
+        if pat.search(title or ""):
+            hits += 2
+        elif pat.search(summary or ""):
+            hits += 1
+    return hits
+
+
+def source_weight(source: str, weights: dict[str, float]) -> float:
+    src = (source or "").lower()
+    best = 0.0
+    for key, weight in weights.items():
+        if key in src:
+            best = max(best, weight)
+    return best
+
+
+def priority(entry: dict, now_ts: float, weights: dict[str, float]) -> float:
+    """Laske jonoalkion prioriteetti hetkellä ``now_ts`` (isompi = ensin)."""
+    hits = min(entry.get("whitelist_hits", 0), WHITELIST_MAX_HITS)
+    age_h = max(0.0, (now_ts - entry.get("published_ts", now_ts)) / 3600.0)
+    recency = RECENCY_WEIGHT * 0.5 ** (age_h / POST_RECENCY_HALF_LIFE_H)
+    return WHITELIST_WEIGHT * hits + source_weight(entry.get("source", ""), weights) + recency
+
+
+# ----- Jonon tallennus -----
+
+def _empty_queue() -> dict:
+    return {"entries": [], "sent": {}, "parked": [], "seq": 0}
+
+
+def _valid_entry(e) -> bool:
+    return (
+        isinstance(e, dict)
+        and isinstance(e.get("uid"), str)
+        and isinstance(e.get("seq"), int)
+        and isinstance(e.get("published_ts"), (int, float))
+        and isinstance(e.get("payload"), dict)
+    )
+
+
+def load_queue(path: Path = QUEUE_FILE) -> dict:
+    if not path.exists():
+        return _empty_queue()
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (json.JSONDecodeError, OSError) as e:
+        print(f"[WARN] Jonotiedosto rikki, aloitetaan tyhjästä: {e}", file=sys.stderr)
+        return _empty_queue()
+    if not isinstance(data, dict):
+        print("[WARN] Jonotiedosto rikki, aloitetaan tyhjästä: ei sanakirja", file=sys.stderr)
+        return _empty_queue()
+
+    queue = _empty_queue()
+    expected = {"entries": list, "sent": dict, "parked": list, "seq": int}
+    for key, kind in expected.items():
+        value = data.get(key, queue[key])
+        if not isinstance(value, kind) or isinstance(value, bool):
+            print(f"[WARN] Jonotiedosto rikki, aloitetaan tyhjästä: kenttä {key}", file=sys.stderr)
+            return _empty_queue()
+        queue[key] = value
+    for key in ("entries", "parked"):
+        valid = [e for e in queue[key] if _valid_entry(e)]
+        if len(valid) != len(queue[key]):
+            print(f"[WARN] Ohitetaan {len(queue[key]) - len(valid)} rikkinäistä alkiota ({key})",
+                  file=sys.stderr)
+        queue[key] = valid
+    queue["sent"] = {day: counts for day, counts in queue["sent"].items() if isinstance(counts, dict)}
+    return queue
+
+
+def save_queue(queue: dict, path: Path = QUEUE_FILE) -> None:
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(queue, ensure_ascii=False, indent=2), encoding="utf-8")
+    tmp.replace(path)
+
+
+@contextmanager
+def queue_lock(path: Path = QUEUE_FILE) -> Iterator[None]:
+    """Yksinoikeus jonotiedostoon, jottei haku ja purku kirjoita toistensa yli."""
+    with open(path.with_suffix(".lock"), "w") as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+@contextmanager
+def update_queue(path: Path = QUEUE_FILE) -> Iterator[dict]:
+    """Lue, muokkaa ja tallenna jono lukon alla."""
+    with queue_lock(path):
+        queue = load_queue(path)
+        yield queue
+        save_queue(queue, path)
+
+
+def sync_queue(queue: dict, path: Path, removed: set[str]) -> list[dict]:
+    """
+    Yhdistä tiedostoon muualla lisätyt alkiot ``queue``-jonoon ja tallenna.
+
+    ``removed`` sisältää tämän ajon aikana postatut, sivuun siirretyt ja
+    vanhentuneet uid:t, joita ei palauteta tiedostosta. Palauttaa
+    tiedostosta löytyneet uudet jonoalkiot.
+    """
+    with queue_lock(path):
+        disk = load_queue(path)
+        known = {e["uid"] for e in queue["entries"] + queue["parked"]} | removed
+        new = [e for e in disk["entries"] if e["uid"] not in known]
+        queue["entries"].extend(new)
+        queue["parked"].extend(e for e in disk["parked"] if e["uid"] not in known)
+        queue["seq"] = max(queue["seq"], disk["seq"])
+        save_queue(queue, path)
+    return new
+
+
+def enqueue(
+    queue: dict,
+    uid: str,
+    payload: dict,
+    *,
+    title: str = "",
+    summary: str = "",
+    source: str = "",
+    published_ts: float | None = None,
+    channel: str = DEFAULT_CHANNEL,
+) -> bool:
+    """
+    Lisää webhook-payload jonoon. Palauttaa False, jos ``uid`` on jo jonossa
+    tai sivuun siirrettyjen (``parked``) joukossa.
+    """
+    if any(e["uid"] == uid for e in queue["entries"] + queue["parked"]):
+        return False
+    queue["seq"] += 1
+    queue["entries"].append({
+        "uid": uid,
+        "seq": queue["seq"],
+        "channel": normalize_channel(channel),
+        "source": source,
+        "published_ts": published_ts if published_ts is not None else time.time(),
+        "whitelist_hits": whitelist_strength(title, summary),
+        "payload": payload,
+    })
+    return True
+
+
+def enqueue_item(queue: dict, item: NewsItem, payload: dict, channel: str = DEFAULT_CHANNEL) -> bool:
+    """Lisää jäsennetty ``NewsItem`` jonoon."""
+    return enqueue(
+        queue,
+        item.uid,
+        payload,
+        title=item.title,
+        summary=item.summary,
+        source=item.source,
+        published_ts=item.published_ts,
+        channel=channel,
+    )
+
+
+# ----- Purku -----
+
+# send()-funktion tulokset
+SEND_OK = "ok"                  # postattu
+SEND_RETRY = "retry"            # 429, 5xx tai verkkovirhe: yritä myöhemmin uudelleen
+SEND_FAILED = "failed"          # pysyvä virhe (esim. 400): alkio siirretään sivuun
+SEND_NO_CHANNEL = "no_channel"  # kanavalle ei ole webhookia: ohitetaan kanava
+
+
+class SendResult(NamedTuple):
+    status: str
+    retry_after: float = 0.0
+
+
+def normalize_channel(channel: str | None) -> str:
+    return (channel or DEFAULT_CHANNEL).strip().lower() or DEFAULT_CHANNEL
+
+
+def _budget_left(queue: dict, channel: str, day: str, budgets: dict[str, float]) -> bool:
+    channel = normalize_channel(channel)
+    if channel not in budgets:
+        return True
+    return queue["sent"].get(day, {}).get(channel, 0) < budgets[channel]
+
+
+def drain(
+    queue: dict,
+    send: Callable[[str, dict], SendResult],
+    *,
+    now: Callable[[], float] = time.time,
+    sleep: Callable[[float], None] = time.sleep,
+    max_seconds: float | None = None,
+    interval: float | None = None,
+    path: Path | None = None,
+) -> int:
+    """
+    Pura jonoa prioriteettijärjestyksessä ja palauta postausten määrä.
+
+    Jos ``path`` on annettu, jono tallennetaan (``sync_queue``) jokaisen
+    postatun tai sivuun siirretyn alkion jälkeen. Näin jo postattuja ei
+    lähetetä uudelleen, vaikka ajo keskeytyisi, ja purun aikana lisätyt
+    alkiot otetaan mukaan purkuun.
+
+    ``send(channel, payload)`` palauttaa ``SendResult``-olion:
+    - ``SEND_RETRY``: alkio jää jonoon. Jos ``retry_after`` mahtuu aikarajaan,
+      odotetaan ja yritetään uudelleen, muuten purku lopetetaan ja seuraava
+      ajo jatkaa siitä.
+    - ``SEND_FAILED``: alkio siirretään jonon ``parked``-listalle.
+    - ``SEND_NO_CHANNEL``: kanavan alkiot jäävät jonoon ja muita kanavia
+      puretaan normaalisti.
+    """
+    max_seconds = POST_DRAIN_MAX_SECONDS if max_seconds is None else max_seconds
+    interval = POST_INTERVAL_SECONDS if interval is None else interval
+    start = now()
+    weights = parse_weights(POST_SOURCE_WEIGHTS)
+    budgets = parse_weights(POST_CHANNEL_BUDGETS)
+    quiet = parse_quiet_hours(POST_QUIET_HOURS)
+
+    if in_quiet_hours(datetime.fromtimestamp(start, timezone.utc), quiet):
+        print("Hiljaiset tunnit – jonoa ei pureta.")
+        return 0
+
+    # Pudota liian vanhat
+    max_age = POST_MAX_AGE_H * 3600.0
+    removed: set[str] = set()
+    for key in ("entries", "parked"):
+        fresh = [e for e in queue[key] if start - e["published_ts"] <= max_age]
+        removed.update(e["uid"] for e in queue[key] if start - e["published_ts"] > max_age)
+        queue[key] = fresh
+
+    # Säilytä vain kuluvan päivän laskurit
+    day = datetime.fromtimestamp(start, LOCAL_TZ).date().isoformat()
+    queue["sent"] = {day: queue["sent"].get(day, {})}
+    counts = queue["sent"][day]
+
+    tiebreak = itertools.count()
+    heap: list = []
+
+    def push(entries: list[dict]) -> None:
+        for e in entries:
+            if start - e["published_ts"] <= max_age:
+                heapq.heappush(heap, (-priority(e, start, weights), e["seq"], next(tiebreak), e))
+
+    def sync() -> None:
+        if path is not None:
+            push(sync_queue(queue, path, removed))
+
+    push(queue["entries"])
+    sync()
+
+    posted = 0
+    pause = 0.0
+    skipped_channels: set[str] = set()
+    try:
+        while heap:
+            item = heapq.heappop(heap)
+            entry = item[-1]
+            channel = normalize_channel(entry.get("channel"))
+            if channel in skipped_channels or not _budget_left(queue, channel, day, budgets):
+                continue
+            if pause:
+                sleep(pause)
+            t = now()
+            if t - start >= max_seconds or in_quiet_hours(datetime.fromtimestamp(t, timezone.utc), quiet):
+                break
+
+            result = send(channel, entry["payload"])
+            if result.status == SEND_OK:
+                queue["entries"].remove(entry)
+                removed.add(entry["uid"])
+                counts[channel] = counts.get(channel, 0) + 1
+                posted += 1
+                pause = interval
+                sync()
+            elif result.status == SEND_NO_CHANNEL:
+                skipped_channels.add(channel)
+            elif result.status == SEND_FAILED:
+                queue["entries"].remove(entry)
+                queue["parked"].append(entry)
+                pause = interval
+                sync()
+            else:
+                if result.retry_after and t + result.retry_after - start < max_seconds:
+                    heapq.heappush(heap, item)
+                    pause = result.retry_after
+                    continue
+                break
+    finally:
+        sync()
+    return posted
+
+
+def webhook_for(channel: str) -> str:
+    channel = normalize_channel(channel)
+    if channel == DEFAULT_CHANNEL:
+        return os.environ.get("DISCORD_WEBHOOK_URL", "")
+    return os.environ.get(f"DISCORD_WEBHOOK_URL_{channel.upper()}", "")
+
+
+def _retry_after(r) -> float:
+    try:
+        return max(0.0, float(r.headers.get("Retry-After", "0")))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def send_webhook(channel: str, payload: dict) -> SendResult:
+    url = webhook_for(channel)
+    if not url:
+        print(f"[WARN] Ei webhookia kanavalle {channel}", file=sys.stderr)
+        return SendResult(SEND_NO_CHANNEL)
+    try:
+        r = requests.post(url, json=payload, timeout=20)
+    except requests.RequestException as e:
+        print(f"[WARN] Postaus epäonnistui: {e}", file=sys.stderr)
+        return SendResult(SEND_RETRY)
+    if r.status_code == 429:
+        print("[WARN] Discord rate limit", file=sys.stderr)
+        return SendResult(SEND_RETRY, _retry_after(r))
+    if r.status_code >= 500:
+        print(f"[WARN] Discord {r.status_code}, yritetään myöhemmin", file=sys.stderr)
+        return SendResult(SEND_RETRY)
+    if r.status_code >= 300:
+        print(f"[WARN] Discord {r.status_code}: {r.text[:200]}", file=sys.stderr)
+        return SendResult(SEND_FAILED)
+    return SendResult(SEND_OK)
+
+
+def main():
+    queue = load_queue()
+    posted = drain(queue, send_webhook, path=QUEUE_FILE)
+    print(f"Postattu {posted}, jonossa {len(queue['entries'])}, sivussa {len(queue['parked'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,10 @@ import re, pathlib, sys
 from urllib.parse import urlparse
 
 import requests
-from bs4 import BeautifulSoup
+
+# Jaettu HTML-siivous asuu uutisbotin hakemistossa
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1] / "rcf-discord-news"))
+from html_text import html_to_text
 
 # ----- Polut -----
 BASE = pathlib.Path("rcf-discord-news")                 # <-- oikea kansio
@@ -34,13 +37,8 @@ def fetch_text(url: str) -> str:
     headers = {"User-Agent": "Mozilla/5.0 (blocklist-suggester)"}
     r = requests.get(url, timeout=20, headers=headers)
     r.raise_for_status()
-    soup = BeautifulSoup(r.text, "html.parser")
-    # Poista epäolennaiset osat
-    for t in soup(["script", "style", "nav", "aside", "footer", "header", "noscript"]):
-        t.decompose()
-    text = soup.get_text(separator=" ")
-    text = re.sub(r"\s+", " ", text).strip()
-    return text
+    # Epäolennaiset osat (script, nav, footer...) ohitetaan jo tokenisoinnissa
+    return html_to_text(r.text)
 
 def to_keywords(text: str, top_k: int = TOP_K):
     # Poimi "sanat" (sallitut kirjaimet myös ääkköset ja numerot, väliviiva ok)
@@ -0,0 +1,78 @@
+import sys
+from collections import OrderedDict
+from pathlib import Path
+
+# Lisää rcf-discord-news polkuun, jotta moduuli löytyy
+sys.path.append(str(Path(__file__).resolve().parents[1] / "rcf-discord-news"))
+
+import html_text as ht
+
+
+def test_html_to_text_drops_boilerplate():
+    raw = (
+        "<html><head><style>p {color: red}</style></head><body>"
+        "<header>Valikko</header><nav><a href='/'>Etusivu</a></nav>"
+        "<p>Zwift&nbsp;julkaisi <b>uuden</b>\n reitin.</p><p>Toinen kappale</p>"
+        "<script>var x = '<p>ei tätä</p>';</script><footer>©</footer></body></html>"
+    )
+    assert ht.html_to_text(raw) == "Zwift julkaisi uuden reitin. Toinen kappale"
+
+
+def test_html_to_text_keeps_inline_words_together():
+    assert ht.html_to_text("Zw<em>ift</em><br>Racing") == "Zwift Racing"
+
+
+def test_unclosed_skip_tag_closes_with_parent():
+    assert ht.html_to_text("<header><nav>menu</header><p>Body text</p>") == "Body text"
+    assert ht.html_to_text("<div><aside>mainos</div><p>Teksti</p>") == "Teksti"
+
+
+def test_badly_nested_skip_tags():
+    raw = "<nav><footer>a</nav>b</footer><p>Teksti</p></p></div>"
+    assert ht.html_to_text(raw) == "b Teksti"
+
+
+def test_form_wrapped_page_keeps_body():
+    raw = "<body><form id='aspnetForm'><div><p>Artikkelin teksti</p></div></form></body>"
+    assert ht.html_to_text(raw) == "Artikkelin teksti"
+
+
+def test_html_to_text_caps_input_and_memoizes(monkeypatch):
+    monkeypatch.setattr(ht, "_CACHE", OrderedDict())
+    calls = []
+    real = ht._extract
+    monkeypatch.setattr(ht, "_extract", lambda raw: calls.append(raw) or real(raw))
+    raw = "<p>" + "a" * 50 + "</p>"
+    assert ht.html_to_text(raw, max_chars=10) == "a" * 7
+    assert ht.html_to_text(raw, max_chars=10) == "a" * 7
+    assert len(calls) == 1
+
+
+def test_cap_does_not_cut_inside_tag(monkeypatch):
+    monkeypatch.setattr(ht, "_CACHE", OrderedDict())
+    raw = "<p>Teksti</p><img src='x' alt='kuva'><p>Loppu</p>"
+    assert ht.html_to_text(raw, max_chars=raw.index("alt")) == "Teksti"
+    assert ht.html_to_text(raw, max_chars=raw.index("Loppu") + 2) == "Teksti Lo"
+
+
+def test_cache_round_trip(monkeypatch, tmp_path):
+    monkeypatch.setattr(ht, "_CACHE", OrderedDict())
+    ht.html_to_text("<p>tallenna</p>")
+    path = tmp_path / "cache.json"
+    ht.save_cache(path)
+    monkeypatch.setattr(ht, "_CACHE", OrderedDict())
+    ht.load_cache(path)
+    assert "tallenna" in ht._CACHE.values()
+
+
+def test_load_cache_skips_non_dict_and_trims(monkeypatch, tmp_path):
+    monkeypatch.setattr(ht, "_CACHE", OrderedDict(old="vanha"))
+    monkeypatch.setattr(ht, "CACHE_SIZE", 2)
+    path = tmp_path / "cache.json"
+    path.write_text("[]", encoding="utf-8")
+    ht.load_cache(path)
+    assert list(ht._CACHE) == ["old"]
+
+    path.write_text('{"a": "1", "b": "2"}', encoding="utf-8")
+    ht.load_cache(path)
+    assert list(ht._CACHE) == ["a", "b"]
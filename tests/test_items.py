@@ -0,0 +1,71 @@
+import hashlib
+import sys
+import time
+from pathlib import Path
+
+# Lisää rcf-discord-news polkuun, jotta moduuli löytyy
+sys.path.append(str(Path(__file__).resolve().parents[1] / "rcf-discord-news"))
+
+import items
+import post_queue as pq
+
+
+ENTRY = {
+    "link": "https://Example.com/news/zwift?utm_source=rss&id=5#comments",
+    "title": "  Top 5 <Zwift> &amp;lt; MyWhoosh\n update ",
+    "summary": "<p>Uusi   <a href='x'>päivitys</a></p>",
+    "content": [{"value": "<div>" + "x" * 10000 + "</div>"}],
+    "published_parsed": time.struct_time((2026, 6, 1, 10, 0, 0, 0, 152, 0)),
+    "media_thumbnail": [{"url": "https://example.com/thumb.jpg"}],
+}
+
+
+def test_from_entry_keeps_only_needed_fields():
+    item = items.from_entry(ENTRY, "Example", topic_key=lambda t: t.lower())
+    assert item.link == "https://example.com/news/zwift?id=5"
+    assert item.uid == items.id_hash(ENTRY["link"])
+    assert item.title == "Top 5 <Zwift> &amp;lt; MyWhoosh update"
+    assert item.summary == "Uusi päivitys"
+    assert item.topic_key == "top 5 <zwift> &amp;lt; mywhoosh update"
+    assert item.thumbnail == "https://example.com/thumb.jpg"
+    assert item.published_ts == 1780308000.0
+    assert not hasattr(item, "__dict__")
+
+
+def test_uid_is_not_affected_by_canonicalisation():
+    # seen.json sisältää alkuperäisen linkin sha256-tiivisteitä
+    raw = "https://Example.com/a b?utm_source=x#frag"
+    item = items.from_entry({"link": raw, "title": "t"}, "Example")
+    assert item.link == "https://example.com/a b"
+    assert item.uid == hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def test_canonical_link_keeps_query_as_given():
+    url = "https://Example.com/p?article&x=%2F;y=a+b&utm_medium=rss&fbclid=1&z=%C3%A4"
+    assert items.canonical_link(url) == "https://example.com/p?article&x=%2F;y=a+b&z=%C3%A4"
+    assert items.canonical_link("https://example.com/p?utm_source=x") == "https://example.com/p"
+
+
+def test_thumbnail_ignores_non_image_media():
+    entry = {
+        "link": "https://example.com/v",
+        "media_content": [
+            {"url": "https://example.com/v.mp4", "type": "video/mp4", "medium": "video"},
+            {"url": "https://example.com/a.mp3", "type": "audio/mpeg"},
+            {"url": "https://example.com/i.jpg", "medium": "image"},
+        ],
+    }
+    assert items.from_entry(entry, "Example").thumbnail == "https://example.com/i.jpg"
+    entry["media_content"] = entry["media_content"][:2]
+    assert items.from_entry(entry, "Example").thumbnail == ""
+
+
+def test_enqueue_item_uses_item_fields(tmp_path):
+    queue = pq.load_queue(tmp_path / "queue.json")
+    item = items.from_entry(ENTRY, "Example")
+    assert pq.enqueue_item(queue, item, {"content": "a"})
+    assert not pq.enqueue_item(queue, item, {"content": "b"})
+    entry = queue["entries"][0]
+    assert entry["uid"] == item.uid
+    assert entry["source"] == "Example"
+    assert entry["published_ts"] == item.published_ts
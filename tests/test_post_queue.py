@@ -0,0 +1,202 @@
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Lisää rcf-discord-news polkuun, jotta moduuli löytyy
+sys.path.append(str(Path(__file__).resolve().parents[1] / "rcf-discord-news"))
+
+import post_queue as pq
+
+
+NOW = datetime(2026, 6, 1, 12, 0, tzinfo=pq.LOCAL_TZ).timestamp()
+OK = pq.SendResult(pq.SEND_OK)
+
+
+def _queue_with(monkeypatch, tmp_path):
+    wl = tmp_path / "whitelist.txt"
+    wl.write_text("# kommentti\nZwift\nMyWhoosh\n", encoding="utf-8")
+    monkeypatch.setattr(pq, "_WHITELIST_PATTERNS", pq.load_whitelist_patterns(wl))
+    queue = pq.load_queue(tmp_path / "queue.json")
+    pq.enqueue(queue, "a", {"content": "a"}, title="Random road race", published_ts=NOW)
+    pq.enqueue(queue, "b", {"content": "b"}, title="Zwift update", published_ts=NOW - 3600)
+    pq.enqueue(queue, "c", {"content": "c"}, title="Something", source="zwiftinsider.com",
+               published_ts=NOW - 7200)
+    return queue
+
+
+def test_drain_orders_by_priority(monkeypatch, tmp_path):
+    queue = _queue_with(monkeypatch, tmp_path)
+    monkeypatch.setattr(pq, "POST_SOURCE_WEIGHTS", "zwiftinsider.com=10")
+    sent = []
+    posted = pq.drain(queue, lambda ch, p: sent.append(p["content"]) or OK,
+                      now=lambda: NOW, sleep=lambda s: None)
+    assert posted == 3
+    assert sent == ["c", "b", "a"]
+    assert queue["entries"] == []
+
+
+def test_enqueue_skips_duplicate_uid(monkeypatch, tmp_path):
+    queue = _queue_with(monkeypatch, tmp_path)
+    assert not pq.enqueue(queue, "a", {"content": "a2"})
+    assert len(queue["entries"]) == 3
+
+
+def test_channel_budget_and_failure_keep_items(monkeypatch, tmp_path):
+    queue = _queue_with(monkeypatch, tmp_path)
+    monkeypatch.setattr(pq, "POST_CHANNEL_BUDGETS", "news=1")
+    posted = pq.drain(queue, lambda ch, p: OK, now=lambda: NOW, sleep=lambda s: None)
+    assert posted == 1
+    assert len(queue["entries"]) == 2
+
+    monkeypatch.setattr(pq, "POST_CHANNEL_BUDGETS", "")
+    retry = pq.SendResult(pq.SEND_RETRY)
+    assert pq.drain(queue, lambda ch, p: retry, now=lambda: NOW, sleep=lambda s: None) == 0
+    assert len(queue["entries"]) == 2
+
+
+def test_quiet_hours_and_persistence(monkeypatch, tmp_path):
+    queue = _queue_with(monkeypatch, tmp_path)
+    monkeypatch.setattr(pq, "POST_QUIET_HOURS", "11-13")
+    assert pq.drain(queue, lambda ch, p: OK, now=lambda: NOW, sleep=lambda s: None) == 0
+
+    path = tmp_path / "queue.json"
+    pq.save_queue(queue, path)
+    assert len(pq.load_queue(path)["entries"]) == 3
+
+
+def test_parse_quiet_hours_wraps_midnight():
+    quiet = pq.parse_quiet_hours("23-7")
+    assert pq.in_quiet_hours(datetime(2026, 6, 1, 2, 0, tzinfo=pq.LOCAL_TZ), quiet)
+    assert not pq.in_quiet_hours(datetime(2026, 6, 1, 12, 0, tzinfo=pq.LOCAL_TZ), quiet)
+
+
+def test_failing_entries_do_not_block_other_channels(monkeypatch, tmp_path):
+    queue = _queue_with(monkeypatch, tmp_path)
+    pq.enqueue(queue, "x", {"content": "x"}, title="Zwift MyWhoosh", channel="Review",
+               published_ts=NOW)
+    pq.enqueue(queue, "bad", {"content": "bad"}, title="Zwift MyWhoosh", published_ts=NOW)
+    monkeypatch.setenv("DISCORD_WEBHOOK_URL", "https://example.com/news")
+    monkeypatch.delenv("DISCORD_WEBHOOK_URL_REVIEW", raising=False)
+
+    class Resp:
+        text = "bad payload"
+        headers = {}
+
+        def __init__(self, status):
+            self.status_code = status
+
+    posted = []
+
+    def fake_post(url, json, timeout):
+        if json["content"] == "bad":
+            return Resp(400)
+        posted.append(json["content"])
+        return Resp(204)
+
+    monkeypatch.setattr(pq.requests, "post", fake_post)
+    assert pq.drain(queue, pq.send_webhook, now=lambda: NOW, sleep=lambda s: None) == 3
+    assert sorted(posted) == ["a", "b", "c"]
+    assert [e["uid"] for e in queue["entries"]] == ["x"]
+    assert queue["entries"][0]["channel"] == "review"
+    assert [e["uid"] for e in queue["parked"]] == ["bad"]
+
+
+def test_retry_after_is_honoured(monkeypatch, tmp_path):
+    queue = _queue_with(monkeypatch, tmp_path)
+    results = [pq.SendResult(pq.SEND_RETRY, 5.0)]
+    slept = []
+    posted = pq.drain(queue, lambda ch, p: results.pop() if results else OK,
+                      now=lambda: NOW, sleep=slept.append, interval=1)
+    assert posted == 3
+    assert slept == [5.0, 1, 1]
+
+
+def test_quiet_hours_and_time_limit_checked_after_sleep(monkeypatch, tmp_path):
+    queue = _queue_with(monkeypatch, tmp_path)
+    clock = [datetime(2026, 6, 1, 22, 59, 50, tzinfo=pq.LOCAL_TZ).timestamp()]
+    monkeypatch.setattr(pq, "POST_QUIET_HOURS", "23-7")
+    monkeypatch.setattr(pq, "POST_MAX_AGE_H", 1000)
+    sleep = lambda s: clock.__setitem__(0, clock[0] + s)
+    assert pq.drain(queue, lambda ch, p: OK, now=lambda: clock[0], sleep=sleep, interval=20) == 1
+
+    monkeypatch.setattr(pq, "POST_QUIET_HOURS", "")
+    posted = pq.drain(queue, lambda ch, p: OK, now=lambda: clock[0], sleep=sleep,
+                      interval=20, max_seconds=30)
+    assert posted == 2
+
+
+def test_channel_budget_ignores_case(monkeypatch, tmp_path):
+    queue = _queue_with(monkeypatch, tmp_path)
+    for e in queue["entries"]:
+        e["channel"] = "News"
+    monkeypatch.setattr(pq, "POST_CHANNEL_BUDGETS", "news=1")
+    assert pq.drain(queue, lambda ch, p: OK, now=lambda: NOW, sleep=lambda s: None) == 1
+
+
+def test_load_queue_falls_back_on_wrong_types(tmp_path, capsys):
+    path = tmp_path / "queue.json"
+    for raw in ("[]", "null", '{"entries": null}', '{"seq": "1"}'):
+        path.write_text(raw, encoding="utf-8")
+        queue = pq.load_queue(path)
+        assert queue == {"entries": [], "sent": {}, "parked": [], "seq": 0}
+        assert pq.enqueue(queue, "a", {"content": "a"})
+        assert "[WARN]" in capsys.readouterr().err
+
+    path.write_text('{"entries": [{"uid": "a"}, 3], "seq": 0}', encoding="utf-8")
+    assert pq.load_queue(path)["entries"] == []
+
+
+def test_enqueue_skips_parked_uid(monkeypatch, tmp_path):
+    queue = _queue_with(monkeypatch, tmp_path)
+    failed = pq.SendResult(pq.SEND_FAILED)
+    pq.drain(queue, lambda ch, p: failed, now=lambda: NOW, sleep=lambda s: None)
+    assert len(queue["parked"]) == 3
+    assert not pq.enqueue(queue, "a", {"content": "a"})
+
+
+def test_env_float_falls_back_on_bad_values(monkeypatch, capsys):
+    monkeypatch.setenv("POST_RECENCY_HALF_LIFE_H", "0")
+    assert pq.env_float("POST_RECENCY_HALF_LIFE_H", 12.0, positive=True) == 12.0
+    monkeypatch.setenv("POST_INTERVAL_SECONDS", "abc")
+    assert pq.env_float("POST_INTERVAL_SECONDS", 20.0) == 20.0
+    assert capsys.readouterr().err.count("[WARN]") == 2
+    monkeypatch.setenv("POST_INTERVAL_SECONDS", "5")
+    assert pq.env_float("POST_INTERVAL_SECONDS", 20.0) == 5.0
+
+
+def test_drain_saves_after_each_post_and_keeps_new_entries(monkeypatch, tmp_path):
+    path = tmp_path / "queue.json"
+    queue = _queue_with(monkeypatch, tmp_path)
+    pq.save_queue(queue, path)
+    sent = []
+
+    def send(channel, payload):
+        if not sent:
+            # Uutishaku lisää alkion kesken purun
+            with pq.update_queue(path) as q:
+                pq.enqueue(q, "new", {"content": "new"}, title="Zwift MyWhoosh",
+                           published_ts=NOW)
+        if len(sent) == 2:
+            raise RuntimeError("kaatui")
+        sent.append(payload["content"])
+        return OK
+
+    try:
+        pq.drain(queue, send, now=lambda: NOW, sleep=lambda s: None, path=path)
+    except RuntimeError:
+        pass
+    assert sent == ["b", "new"]
+    on_disk = {e["uid"] for e in pq.load_queue(path)["entries"]}
+    assert on_disk == {"a", "c"}
+
+
+def test_main_style_drain_picks_up_queued_file(monkeypatch, tmp_path):
+    path = tmp_path / "queue.json"
+    queue = _queue_with(monkeypatch, tmp_path)
+    pq.save_queue(queue, path)
+    stale = pq.load_queue(path)
+    with pq.update_queue(path) as q:
+        pq.enqueue(q, "late", {"content": "late"}, published_ts=NOW)
+    posted = pq.drain(stale, lambda ch, p: OK, now=lambda: NOW, sleep=lambda s: None, path=path)
+    assert posted == 4
+    assert pq.load_queue(path)["entries"] == []